@@ -13,6 +13,14 @@ class BackendSettings:
     output_dir: Path
     cors_allow_origins: list[str]
     debug_log_path: Path
+    # torch.compile the SD UNet/VAE on CUDA (DNA_COMPILE_UNET=0 to disable).
+    compile_unet: bool = True
+    # Dummy inferences after model load so the first real request doesn't pay
+    # compile/autotune latency (DNA_WARMUP=0 to disable).
+    warmup_on_startup: bool = True
+    # Shapes to warm — with dynamic=False compile, each new shape recompiles
+    # on first hit (DNA_WARMUP_SHAPES="512x512,768x768").
+    warmup_shapes: tuple[tuple[int, int], ...] = ((512, 512),)
 
 
 def _parse_origins(raw: str) -> list[str]:
@@ -29,6 +37,21 @@ def _parse_origins(raw: str) -> list[str]:
     return [x.strip() for x in raw.split(",") if x.strip()]
 
 
+def _parse_shapes(raw: str) -> tuple[tuple[int, int], ...]:
+    """Parse 'WxH,WxH' into shape tuples; malformed entries are skipped."""
+    shapes = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            w, _, h = part.partition("x")
+            shapes.append((int(w), int(h)))
+        except ValueError:
+            continue
+    return tuple(shapes)
+
+
 def load_settings() -> BackendSettings:
     # backend/app/config.py -> repo_root
     repo_root = Path(__file__).resolve().parents[2]
@@ -53,5 +76,8 @@ def load_settings() -> BackendSettings:
         output_dir=output_dir,
         cors_allow_origins=cors_allow_origins,
         debug_log_path=debug_log_path,
+        compile_unet=os.getenv("DNA_COMPILE_UNET", "1") != "0",
+        warmup_on_startup=os.getenv("DNA_WARMUP", "1") != "0",
+        warmup_shapes=_parse_shapes(os.getenv("DNA_WARMUP_SHAPES", "512x512")) or ((512, 512),),
     )
 
@@ -2,12 +2,25 @@ from __future__ import annotations
 
 import asyncio
 import json
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
 from sse_starlette.sse import EventSourceResponse
 
 from .jobs import JobStore, JobEvent
 
+try:
+    # orjson serializes small dicts several times faster than the stdlib,
+    # which adds up at one payload per diffusion step per subscriber.
+    import orjson
+
+    def json_dumps(data: Any) -> str:
+        return orjson.dumps(data).decode()
+
+except ImportError:
+
+    def json_dumps(data: Any) -> str:
+        return json.dumps(data)
+
 
 async def sse_event_stream(store: JobStore, job_id: str) -> AsyncGenerator[dict, None]:
     """
@@ -17,13 +30,13 @@ async def sse_event_stream(store: JobStore, job_id: str) -> AsyncGenerator[dict,
     """
     history = await store.list_events_snapshot(job_id)
     for ev in history:
-        yield {"event": ev.event, "data": json.dumps(ev.data)}
+        yield {"event": ev.event, "data": json_dumps(ev.data)}
 
     q = await store.subscribe(job_id)
     try:
         while True:
             ev: JobEvent = await q.get()
-            yield {"event": ev.event, "data": json.dumps(ev.data)}
+            yield {"event": ev.event, "data": json_dumps(ev.data)}
     finally:
         await store.unsubscribe(job_id, q)
 
@@ -43,6 +43,16 @@ class JobRecord:
     done: asyncio.Event = field(default_factory=asyncio.Event)
 
 
+def _release_payload(rec: JobRecord) -> None:
+    """
+    Drop the input image buffer once a job is terminal. Queued/running
+    payloads are bounded by the queue limits, but finished records linger
+    for the TTL window — without this, every completed upload pins its
+    multi-MB input in RAM for an hour.
+    """
+    rec.payload.pop("image_bytes", None)
+
+
 @dataclass
 class JobEvent:
     event: str
@@ -90,7 +100,9 @@ class JobStore:
         async with self._lock:
             if job_id not in self._jobs:
                 raise KeyError(job_id)
-            q: asyncio.Queue[JobEvent] = asyncio.Queue()
+            # Bounded: a slow/stalled consumer holds O(1) memory instead of
+            # accumulating one entry per diffusion step.
+            q: asyncio.Queue[JobEvent] = asyncio.Queue(maxsize=32)
             self._subscribers[job_id].add(q)
             return q
 
@@ -114,8 +126,18 @@ class JobStore:
                 try:
                     q.put_nowait(ev)
                 except asyncio.QueueFull:
-                    # Unbounded queues are expected; if a queue is full, drop the event for that subscriber.
-                    pass
+                    if ev.event == "progress":
+                        # Slow consumer only needs the latest progress frame.
+                        continue
+                    # Terminal/lifecycle events must land: evict the oldest.
+                    try:
+                        q.get_nowait()
+                    except asyncio.QueueEmpty:
+                        pass
+                    try:
+                        q.put_nowait(ev)
+                    except asyncio.QueueFull:
+                        pass
 
     async def set_running(self, job_id: str) -> None:
         rec = await self.get(job_id)
@@ -123,6 +145,33 @@ class JobStore:
         rec.started_at = int(time.time())
         await self.emit(job_id, "started", {"status": "running"})
 
+    async def try_set_running(self, job_id: str) -> Optional[JobRecord]:
+        """
+        Atomically transition a queued job to running and return its record.
+        Returns None when the job is gone or was cancelled between enqueue
+        and worker pickup — finalizing the cancel if it's still pending —
+        so there is no check-then-act gap against a concurrent /cancel.
+        """
+        async with self._lock:
+            rec = self._jobs.get(job_id)
+            if rec is None or rec.status == "cancelled":
+                return None
+            if rec.cancel_requested and rec.status == "queued":
+                rec.status = "cancelled"
+                rec.ended_at = int(time.time())
+                _release_payload(rec)
+                rec.done.set()
+                cancelled = True
+            else:
+                rec.status = "running"
+                rec.started_at = int(time.time())
+                cancelled = False
+        if cancelled:
+            await self.emit(job_id, "cancelled", {"status": "cancelled"})
+            return None
+        await self.emit(job_id, "started", {"status": "running"})
+        return rec
+
     async def set_progress(self, job_id: str, *, current: int, total: int, stage: str = "") -> None:
         rec = await self.get(job_id)
         rec.progress.current = current
@@ -145,6 +194,7 @@ class JobStore:
         rec.status = "succeeded"
         rec.ended_at = int(time.time())
         rec.result = result
+        _release_payload(rec)
         rec.done.set()
         await self.emit(job_id, "completed", {"status": "succeeded", "result": result})
     async def fail(self, job_id: str, message: str) -> None:
@@ -152,6 +202,7 @@ class JobStore:
         rec.status = "failed"
         rec.ended_at = int(time.time())
         rec.error = JobError(message=message)
+        _release_payload(rec)
         rec.done.set()
         await self.emit(job_id, "failed", {"status": "failed", "error": {"message": message}})
 
@@ -161,6 +212,7 @@ class JobStore:
         if rec.status == "queued":
             rec.status = "cancelled"
             rec.ended_at = int(time.time())
+            _release_payload(rec)
             rec.done.set()
             await self.emit(job_id, "cancelled", {"status": "cancelled"})
 
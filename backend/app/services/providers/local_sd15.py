@@ -3,20 +3,32 @@ from __future__ import annotations
 import asyncio
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Optional
 
 import torch
 
-from ..img2img_service import Img2ImgParams, Img2ImgService
+from ..img2img_service import Img2ImgParams, Img2ImgService, decode_image_rgb
 from ...runtime.concurrency import ConcurrencyManager
 from .base import Img2ImgProvider, JobEmitter, ProviderContext
 
 
+@dataclass(frozen=True)
+class ModelHandle:
+    """
+    Immutable snapshot of a loaded pipeline. Published with one atomic
+    assignment after load/reload finishes, so a request reads a consistent
+    (pipeline, device, dtype) triple instead of three globals that can
+    transiently disagree mid-reload.
+    """
+
+    pipeline: Any
+    device: str
+    dtype: torch.dtype
+
+
 @dataclass(frozen=True)
 class SD15ProviderDeps:
-    get_pipeline: Callable[[], Any]
-    is_loaded: Callable[[], bool]
-    get_current_device: Callable[[], str]
+    get_handle: Callable[[], Optional[ModelHandle]]
     set_scheduler: Callable[[Any, str, str], None]
     concurrency: ConcurrencyManager
     output_dir: Path
@@ -31,14 +43,20 @@ class LocalSD15Provider(Img2ImgProvider):
         # payload expects:
         # - image_bytes: bytes
         # - params: Img2ImgParams fields
-        pipeline = self.deps.get_pipeline()
-        if not self.deps.is_loaded() or pipeline is None:
+        handle = self.deps.get_handle()
+        if handle is None:
             raise RuntimeError("Model not loaded")
+        pipeline = handle.pipeline
 
         image_bytes: bytes = payload["image_bytes"]
         params_dict: dict = payload["params"]
         emit_progress: bool = bool(payload.get("emit_progress", True))
 
+        # Decode before the GPU semaphore so this request's CPU work overlaps
+        # whatever is currently on the GPU. The endpoint hands us the client's
+        # original encoded bytes, so this is the only decode on the path.
+        input_image = await asyncio.to_thread(decode_image_rgb, image_bytes)
+
         # Ensure consistent backpressure with existing semaphores
         async with self.deps.concurrency.sd_img2img:
             # scheduler mutation must be guarded too (shared pipeline)
@@ -60,16 +78,12 @@ class LocalSD15Provider(Img2ImgProvider):
 
             # Run in a thread to avoid blocking the event loop
             def _run_sync() -> dict:
-                from PIL import Image
-                import io
-
-                input_image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
                 return self.svc.run(
                     pipeline=pipeline,
                     model_loaded=True,
                     params=Img2ImgParams(**params_dict),
                     input_image=input_image,
-                    current_device=self.deps.get_current_device(),
+                    current_device=handle.device,
                     progress_callback=progress_callback,
                 )
 
@@ -77,3 +91,35 @@ class LocalSD15Provider(Img2ImgProvider):
             result = await asyncio.to_thread(_run_sync)
             return {k: result[k] for k in ["status", "image", "time_taken", "width", "height", "output_path"]}
 
+    async def execute_batch(self, *, ctx: ProviderContext, payloads: list[dict]) -> list[dict]:
+        """
+        Run compatible payloads through one batched pipeline call.
+        The caller groups payloads on (sampler, scheduler, steps, cfg, denoise);
+        size mismatches surface as ValueError for sequential fallback.
+        """
+        handle = self.deps.get_handle()
+        if handle is None:
+            raise RuntimeError("Model not loaded")
+        pipeline = handle.pipeline
+
+        first = payloads[0]["params"]
+        input_images = await asyncio.to_thread(
+            lambda: [decode_image_rgb(p["image_bytes"]) for p in payloads]
+        )
+        async with self.deps.concurrency.sd_img2img:
+            self.deps.set_scheduler(pipeline, first["sampler_name"], first["scheduler"])
+
+            def _run_sync() -> list[dict]:
+                return self.svc.run_batch(
+                    pipeline=pipeline,
+                    params_list=[Img2ImgParams(**p["params"]) for p in payloads],
+                    input_images=input_images,
+                    current_device=handle.device,
+                )
+
+            results = await asyncio.to_thread(_run_sync)
+            return [
+                {k: r[k] for k in ["status", "image", "time_taken", "width", "height", "output_path"]}
+                for r in results
+            ]
+
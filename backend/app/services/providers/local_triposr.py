@@ -5,7 +5,13 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Callable
 
-from ..triposr_service import TripoSRParams, TripoSRService
+from ..triposr_service import (
+    TripoSRParams,
+    TripoSRService,
+    cache_result,
+    get_cached_result,
+    result_cache_key,
+)
 from ...runtime.concurrency import ConcurrencyManager
 from .base import JobEmitter, ProviderContext, TripoSRProvider
 
@@ -32,9 +38,27 @@ class LocalTripoSRProvider(TripoSRProvider):
         params_dict: dict = payload["params"]
         params = TripoSRParams(**params_dict)
 
+        # Identical upload + identical params: hand back the memoized result
+        # before spending seconds of GPU time re-deriving the same mesh.
+        cache_key = await asyncio.to_thread(result_cache_key, params, image_bytes)
+        cached = get_cached_result(cache_key)
+        if cached is not None:
+            await emitter.started()
+            return cached
+
         # Coarse staged progress (TripoSR is not step-based like SD)
         await emitter.progress(current=1, total=4, stage="preprocess")
 
+        # Decode + background removal run before the GPU semaphore: one job's
+        # CPU preprocessing overlaps another job's inference. On CUDA the
+        # composite is fused into the device upload.
+        input_image = await asyncio.to_thread(
+            self.svc.preprocess_sync,
+            params=params,
+            image_bytes=image_bytes,
+            device=getattr(model, "_device_str", None),
+        )
+
         async with self.deps.concurrency.triposr:
             await emitter.progress(current=2, total=4, stage="inference")
 
@@ -45,8 +69,10 @@ class LocalTripoSRProvider(TripoSRProvider):
                 triposr_loaded=True,
                 params=params,
                 image_bytes=image_bytes,
+                input_image=input_image,
             )
 
         await emitter.progress(current=4, total=4, stage="done")
+        cache_result(cache_key, result)
         return result
 
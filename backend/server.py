@@ -13,32 +13,60 @@ import os
 import time
 import uuid
 import logging
+import queue
 import ssl
+import threading
 import certifi
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
+
+try:
+    # SIMD base64 codec; same surface as the stdlib module it replaces.
+    import pybase64 as _b64
+except ImportError:
+    _b64 = base64
+
+if _b64 is base64:
+    def _b64encode_str(data) -> str:
+        return base64.b64encode(data).decode()
+else:
+    # Writes the str result directly, skipping the intermediate bytes
+    # object that b64encode(...).decode() allocates.
+    _b64encode_str = _b64.b64encode_as_string
+
+# CUDA allocator policy: rely on the caching allocator's pool — never call
+# torch.cuda.empty_cache() on the hot path, it destroys the pool and slows
+# subsequent allocations several-fold. Expandable segments avoid long-running
+# fragmentation from the SD/TripoSR mix of transient, shape-varying tensors.
+# Set before importing torch so the policy holds even if a future torch
+# version reads it at import rather than lazily at CUDA init.
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "max_split_size_mb:512,expandable_segments:True")
 
 import torch
 import numpy as np
 from PIL import Image
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Response, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
 from pydantic import BaseModel
 from sse_starlette.sse import EventSourceResponse
 
 from app.config import load_settings
-from app.runtime.device import get_device_and_dtype as _get_device_and_dtype
+from app.runtime.device import (
+    enable_cuda_fast_math,
+    get_device_and_dtype as _get_device_and_dtype,
+)
 from app.storage.artifacts import ArtifactPaths
-from app.services.img2img_service import Img2ImgService, Img2ImgParams
+from app.services.img2img_service import Img2ImgService, Img2ImgParams, clear_prompt_cache
 from app.services.triposr_service import TripoSRService, TripoSRParams
 from app.runtime.concurrency import ConcurrencyManager
 from app.runtime.jobs import JobStore
 from app.runtime.queue import JobQueueManager
-from app.runtime.events import periodic_cleanup_task
+from app.runtime.events import json_dumps, periodic_cleanup_task
 from app.api.routes_jobs import create_jobs_router
 from app.services.providers.base import ProviderContext
-from app.services.providers.local_sd15 import LocalSD15Provider, SD15ProviderDeps
+from app.services.providers.local_sd15 import LocalSD15Provider, ModelHandle, SD15ProviderDeps
 from app.services.providers.local_triposr import LocalTripoSRProvider, TripoSRProviderDeps
 
 # Configure logging
@@ -53,6 +81,13 @@ os.environ['REQUESTS_CA_BUNDLE'] = certifi.where()
 os.environ['SSL_CERT_FILE'] = certifi.where()
 os.environ['CURL_CA_BUNDLE'] = certifi.where()
 
+# Everything this server loads is on disk — never let from_pretrained probe
+# the Hub (a DNS timeout there stalls startup for seconds). Set before the
+# diffusers/transformers imports below, which read these at import time.
+# The safetensors first-run fallback in startup_event pops them temporarily.
+os.environ.setdefault('HF_HUB_OFFLINE', '1')
+os.environ.setdefault('TRANSFORMERS_OFFLINE', '1')
+
 # Diffusers imports
 from diffusers import (
     StableDiffusionImg2ImgPipeline,
@@ -67,12 +102,72 @@ from diffusers import (
 from diffusers.pipelines.stable_diffusion import StableDiffusionPipelineOutput
 from transformers import CLIPTextModel, CLIPTokenizer
 
+# One-time CUDA tuning (TF32 + cuDNN autotune); no-op on MPS/CPU.
+enable_cuda_fast_math()
+
 app = FastAPI(title="Generative Design Studio Backend", version="1.0.0")
 
 SETTINGS = load_settings()
 CONCURRENCY = ConcurrencyManager()
 JOB_STORE = JobStore(ttl_seconds=60 * 30)
 
+# Bounded handoff to a single writer thread: entries stay ordered, appends
+# never block the event loop or a request handler, and a stuck disk can't
+# grow memory without bound — overflow drops the oldest entry instead.
+_DEBUG_LOG_QUEUE: "queue.Queue[str]" = queue.Queue(maxsize=1024)
+
+
+def _append_debug_payload(payload: str) -> None:
+    try:
+        SETTINGS.debug_log_path.parent.mkdir(parents=True, exist_ok=True)
+        with SETTINGS.debug_log_path.open("a") as f:
+            f.write(payload)
+    except Exception:
+        pass
+
+
+def _debug_log_writer() -> None:
+    while True:
+        lines = [_DEBUG_LOG_QUEUE.get()]
+        # Drain what's pending so bursts cost one open()/write, not one each.
+        while len(lines) < 64:
+            try:
+                lines.append(_DEBUG_LOG_QUEUE.get_nowait())
+            except queue.Empty:
+                break
+        _append_debug_payload("".join(lines))
+
+
+threading.Thread(target=_debug_log_writer, daemon=True, name="debug-log").start()
+
+
+def _debug_entry(location: str, message: str, data: dict, *, run_id: str = "run1") -> dict:
+    return {
+        "sessionId": "debug-session",
+        "runId": run_id,
+        "hypothesisId": "H1",
+        "location": location,
+        "message": message,
+        "data": data,
+        "timestamp": int(time.time() * 1000),
+    }
+
+
+def _debug_log(*entries: dict) -> None:
+    """Queue diagnostic entries for append; never blocks, drops oldest on overflow."""
+    payload = "".join(json.dumps(e) + "\n" for e in entries)
+    try:
+        _DEBUG_LOG_QUEUE.put_nowait(payload)
+    except queue.Full:
+        try:
+            _DEBUG_LOG_QUEUE.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            _DEBUG_LOG_QUEUE.put_nowait(payload)
+        except queue.Full:
+            pass
+
 # CORS for frontend
 app.add_middleware(
     CORSMiddleware,
@@ -82,18 +177,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Serve generated artifacts (GLB/MP4/PNG) at the /data/output/... URLs the
+# job results reference. StaticFiles responds via FileResponse, which uses
+# sendfile(2) on Linux — zero-copy from page cache to socket, with range
+# support for large videos.
+SETTINGS.output_dir.mkdir(parents=True, exist_ok=True)
+app.mount("/data/output", StaticFiles(directory=str(SETTINGS.output_dir)), name="output")
+
 # Global pipeline storage
 pipeline: Optional[StableDiffusionImg2ImgPipeline] = None
 current_device = "cpu"
 model_loaded = False
+# Published atomically at the end of each (re)load; providers read this one
+# reference instead of the three legacy globals above, which can transiently
+# disagree mid-reload. The legacy globals remain for endpoint status reads.
+MODEL_HANDLE: Optional[ModelHandle] = None
 
 # TripoSR model storage
 triposr_model = None
 triposr_loaded = False
-
-# Progress tracking
-progress_updates: dict[str, list] = {}
-
+# Cached at load: walking model.parameters() per request just to read the
+# device is wasted work and couples endpoints to model internals.
+triposr_device = "none"
 
 class Img2ImgRequest(BaseModel):
     """Request model for img2img generation"""
@@ -129,22 +234,46 @@ SCHEDULERS = {
 }
 
 
+# Scheduler instances are pure functions of (sampler, scheduler_type) for a
+# loaded pipeline; cache them instead of rebuilding sigmas tables per request.
+# Cleared on model reload since configs come from the pipeline.
+_scheduler_cache: dict[tuple[str, str], Any] = {}
+
+
 def get_scheduler(sampler_name: str, scheduler_type: str, config):
     """Get the appropriate scheduler based on sampler name and type"""
+    key = (sampler_name, scheduler_type)
+    cached = _scheduler_cache.get(key)
+    if cached is not None:
+        return cached
+
     scheduler_class = SCHEDULERS.get(sampler_name, EulerDiscreteScheduler)
-    
+
     # Create scheduler with appropriate config
     scheduler_config = dict(config)
-    
+
     # Handle karras sigmas for applicable schedulers
     if scheduler_type == "karras" and sampler_name in ["euler", "euler_a", "dpmpp_2m", "dpmpp_sde"]:
         scheduler_config["use_karras_sigmas"] = True
-    
+
     # Handle SDE variants
     if "sde" in sampler_name:
         scheduler_config["algorithm_type"] = "sde-dpmsolver++"
-    
-    return scheduler_class.from_config(scheduler_config)
+
+    scheduler = scheduler_class.from_config(scheduler_config)
+    _scheduler_cache[key] = scheduler
+    return scheduler
+
+
+def _prewarm_schedulers(p: StableDiffusionImg2ImgPipeline) -> None:
+    """Build all common scheduler combinations eagerly so the first request
+    for each sampler pays nothing."""
+    for sampler_name in SCHEDULERS:
+        for scheduler_type in ("normal", "karras"):
+            try:
+                get_scheduler(sampler_name, scheduler_type, p.scheduler.config)
+            except Exception:
+                pass
 
 
 def get_device_and_dtype():
@@ -152,9 +281,15 @@ def get_device_and_dtype():
     return _get_device_and_dtype()
 
 class _StoreEmitter:
+    # Progress is throttled to ~20 Hz: every denoise step still reaches the
+    # emitter, but only step milestones make it through to the JobStore lock
+    # and the SSE fan-out. The final step always emits so clients see 100%.
+    _MIN_INTERVAL = 0.05
+
     def __init__(self, store: JobStore, job_id: str):
         self.store = store
         self.job_id = job_id
+        self._last_emit = 0.0
 
     async def queued(self) -> None:
         return
@@ -164,17 +299,22 @@ class _StoreEmitter:
         return
 
     async def progress(self, *, current: int, total: int, stage: str = "") -> None:
+        now = time.monotonic()
+        if current < total and now - self._last_emit < self._MIN_INTERVAL:
+            return
+        self._last_emit = now
         await self.store.set_progress(self.job_id, current=current, total=total, stage=stage)
 
 def _set_sd_scheduler(p: StableDiffusionImg2ImgPipeline, sampler_name: str, scheduler_type: str) -> None:
-    p.scheduler = get_scheduler(sampler_name, scheduler_type, p.scheduler.config)
+    scheduler = get_scheduler(sampler_name, scheduler_type, p.scheduler.config)
+    # Back-to-back requests with the same sampler keep the attribute as-is.
+    if p.scheduler is not scheduler:
+        p.scheduler = scheduler
 
 # Providers are local-first and wrap existing Phase_0 services.
 SD_PROVIDER = LocalSD15Provider(
     SD15ProviderDeps(
-        get_pipeline=lambda: pipeline,
-        is_loaded=lambda: model_loaded,
-        get_current_device=lambda: current_device,
+        get_handle=lambda: MODEL_HANDLE,
         set_scheduler=_set_sd_scheduler,
         concurrency=CONCURRENCY,
         output_dir=SETTINGS.output_dir,
@@ -191,14 +331,11 @@ TRIPOSR_PROVIDER = LocalTripoSRProvider(
 )
 
 async def _execute_img2img_job(job_id: str) -> None:
-    rec = await JOB_STORE.get(job_id)
-    if rec.status == "cancelled":
-        return
-    if rec.cancel_requested and rec.status == "queued":
-        await JOB_STORE.cancel(job_id)
+    # Atomic queued->running transition; returns None if a concurrent
+    # /cancel won the race, closing the old check-then-act window.
+    rec = await JOB_STORE.try_set_running(job_id)
+    if rec is None:
         return
-
-    await JOB_STORE.set_running(job_id)
     emitter = _StoreEmitter(JOB_STORE, job_id)
     try:
         result = await SD_PROVIDER.execute(ctx=ProviderContext(), payload=rec.payload, emitter=emitter)
@@ -206,15 +343,61 @@ async def _execute_img2img_job(job_id: str) -> None:
     except Exception as e:
         await JOB_STORE.fail(job_id, str(e))
 
+async def _execute_img2img_batch(job_ids: list[str]) -> None:
+    """
+    Coalesce drained img2img jobs into batched pipeline calls where their
+    parameters allow; everything else runs through the single-job path.
+    Jobs that need per-step progress are kept sequential so SSE clients
+    still see denoise progress.
+    """
+    # Cheap pre-filter for grouping; the authoritative cancel check is the
+    # atomic try_set_running transition just before each job runs.
+    recs = []
+    for job_id in job_ids:
+        rec = await JOB_STORE.get(job_id)
+        if rec.status != "cancelled":
+            recs.append(rec)
+
+    groups: dict[tuple, list] = {}
+    for rec in recs:
+        p = rec.payload["params"]
+        emit_progress = bool(rec.payload.get("emit_progress", True))
+        key = (emit_progress, p["steps"], p["cfg"], p["sampler_name"], p["scheduler"], p["denoise"])
+        groups.setdefault(key, []).append(rec)
+
+    for key, group in groups.items():
+        emit_progress = key[0]
+        if len(group) == 1 or emit_progress:
+            for rec in group:
+                await _execute_img2img_job(rec.job_id)
+            continue
+
+        group = [rec for rec in group if await JOB_STORE.try_set_running(rec.job_id) is not None]
+        if not group:
+            continue
+        try:
+            results = await SD_PROVIDER.execute_batch(
+                ctx=ProviderContext(), payloads=[rec.payload for rec in group]
+            )
+            for rec, result in zip(group, results):
+                await JOB_STORE.succeed(rec.job_id, result)
+        except Exception:
+            # Size mismatch or batch failure: don't let one bad request fail
+            # its batchmates — retry each job on its own.
+            for rec in group:
+                emitter = _StoreEmitter(JOB_STORE, rec.job_id)
+                try:
+                    result = await SD_PROVIDER.execute(
+                        ctx=ProviderContext(), payload=rec.payload, emitter=emitter
+                    )
+                    await JOB_STORE.succeed(rec.job_id, result)
+                except Exception as e:
+                    await JOB_STORE.fail(rec.job_id, str(e))
+
 async def _execute_triposr_job(job_id: str) -> None:
-    rec = await JOB_STORE.get(job_id)
-    if rec.status == "cancelled":
+    rec = await JOB_STORE.try_set_running(job_id)
+    if rec is None:
         return
-    if rec.cancel_requested and rec.status == "queued":
-        await JOB_STORE.cancel(job_id)
-        return
-
-    await JOB_STORE.set_running(job_id)
     emitter = _StoreEmitter(JOB_STORE, job_id)
     try:
         result = await TRIPOSR_PROVIDER.execute(ctx=ProviderContext(), payload=rec.payload, emitter=emitter)
@@ -226,6 +409,7 @@ JOB_QUEUE = JobQueueManager(
     store=JOB_STORE,
     execute_img2img=_execute_img2img_job,
     execute_triposr=_execute_triposr_job,
+    execute_img2img_batch=_execute_img2img_batch,
 )
 
 async def _ensure_sd_loaded() -> None:
@@ -249,9 +433,88 @@ app.include_router(
 )
 
 
+def _configure_attention(p: StableDiffusionImg2ImgPipeline, device: str) -> None:
+    """
+    Prefer fused memory-efficient attention over attention slicing.
+    Slicing serializes the attention matmul per head in a Python loop and is
+    redundant once xFormers or PyTorch 2.x SDPA provides the same memory
+    savings at much higher throughput.
+    """
+    if device == "cuda":
+        try:
+            p.enable_xformers_memory_efficient_attention()
+            logger.info("Enabled xformers memory efficient attention")
+            return
+        except Exception:
+            pass
+    try:
+        from diffusers.models.attention_processor import AttnProcessor2_0
+
+        p.unet.set_attn_processor(AttnProcessor2_0())
+        logger.info("Enabled fused SDPA attention")
+    except Exception:
+        # Last resort (old torch): fall back to attention slicing.
+        p.enable_attention_slicing()
+        logger.info("Enabled attention slicing (SDPA unavailable)")
+
+
+def _compile_pipeline(p: StableDiffusionImg2ImgPipeline, device: str) -> None:
+    """
+    torch.compile the UNet and VAE decoder on CUDA. reduce-overhead mode
+    captures the per-step graph and removes Python dispatch between the
+    hundreds of submodule calls per denoise step. Silently skipped on older
+    torch / non-CUDA devices; first inference pays the compile cost.
+    """
+    if device != "cuda" or not SETTINGS.compile_unet:
+        return
+    try:
+        # reduce-overhead captures the per-step UNet forward as a CUDA graph
+        # and replays it, eliminating Python/dispatcher/launch overhead per
+        # step — the dominant host cost on short LCM runs. dynamic=False pins
+        # one graph per latent shape; inputs are canonicalized to a small set
+        # of shapes in prepare_sd_image, so the capture set stays bounded.
+        p.unet = torch.compile(p.unet, mode="reduce-overhead", fullgraph=False, dynamic=False)
+        # default mode for the decoder: it runs once per request at whatever
+        # output size the client asked for, and reduce-overhead's cudagraph
+        # capture would re-trigger on every new shape.
+        p.vae.decoder = torch.compile(p.vae.decoder, mode="default", fullgraph=False)
+        logger.info("Compiled UNet (reduce-overhead) and VAE decoder (default)")
+    except Exception:
+        pass
+
+
+def _enable_mps_fp16_autocast(p: StableDiffusionImg2ImgPipeline) -> None:
+    """
+    Run the UNet under fp16 autocast on MPS while keeping weights (and, most
+    importantly, the VAE) in fp32. The known MPS NaN issue is isolated to VAE
+    decode, so there is no reason to pay fp32 matmul cost in the UNet — the
+    dominant per-step cost.
+    """
+    # Probe once at load: older torch (< 2.5) rejects the 'mps' autocast
+    # device type, and the context is otherwise only entered inside the
+    # patched forward — where failing would break every request instead of
+    # falling back to the baseline fp32 path.
+    try:
+        with torch.autocast("mps", dtype=torch.float16):
+            pass
+    except RuntimeError:
+        logger.info("MPS autocast unavailable on this torch; UNet stays fp32")
+        return
+
+    unet = p.unet
+    original_forward = unet.forward
+
+    def forward_autocast(*args, **kwargs):
+        with torch.autocast("mps", dtype=torch.float16):
+            return original_forward(*args, **kwargs)
+
+    unet.forward = forward_autocast
+    logger.info("Enabled fp16 autocast for UNet on MPS (VAE stays fp32)")
+
+
 def load_model_local(model_path: str):
     """Load from local diffusers directory - FULLY OFFLINE, no network"""
-    global pipeline, current_device, model_loaded
+    global pipeline, current_device, model_loaded, MODEL_HANDLE
     
     logger.info(f"Loading model from local directory: {model_path}")
     
@@ -260,31 +523,61 @@ def load_model_local(model_path: str):
     
     try:
         # Load from local diffusers format - no network needed
-        pipeline = StableDiffusionImg2ImgPipeline.from_pretrained(
-            model_path,
+        load_kwargs = dict(
             torch_dtype=torch_dtype,
             local_files_only=True,  # Strictly offline
             safety_checker=None,
             requires_safety_checker=False,
         )
-        
-        logger.info(f"Moving pipeline to {current_device}...")
-        pipeline = pipeline.to(current_device)
-        
-        # Enable memory optimizations
+
+        pipeline = None
         if current_device == "cuda":
-            pipeline.enable_attention_slicing()
+            # device_map streams shards straight onto the GPU with
+            # non_blocking copies instead of materializing on CPU and paying
+            # a second blocking .to() pass — a several-fold cold-start win.
             try:
-                pipeline.enable_xformers_memory_efficient_attention()
-                logger.info("Enabled xformers memory efficient attention")
-            except Exception:
-                pass
-        elif current_device == "mps":
-            pipeline.enable_attention_slicing()
-            logger.info("Enabled attention slicing for MPS")
-            logger.info("Pipeline running in float32 for MPS stability")
-        
+                pipeline = StableDiffusionImg2ImgPipeline.from_pretrained(
+                    model_path, device_map="cuda", **load_kwargs
+                )
+                # Join the async shard copies before anything touches weights.
+                torch.cuda.synchronize()
+            except Exception as e:
+                logger.info(f"device_map load unavailable ({e}); using .to() path")
+                pipeline = None
+
+        if pipeline is None:
+            pipeline = StableDiffusionImg2ImgPipeline.from_pretrained(model_path, **load_kwargs)
+            logger.info(f"Moving pipeline to {current_device}...")
+            pipeline = pipeline.to(current_device)
+
+
+        if current_device == "cuda":
+            # NHWC fp16 convs map directly onto tensor-core tile layouts
+            pipeline.unet.to(memory_format=torch.channels_last)
+            pipeline.vae.to(memory_format=torch.channels_last)
+
+        if current_device != "cpu":
+            # Sliced VAE decode caps peak VRAM/unified memory for
+            # batched/768px requests; it is a no-op at batch size 1. Tiling
+            # is deliberately left off: outputs are capped at 768px where
+            # tiles would only add seams, not savings.
+            pipeline.vae.enable_slicing()
+
+        # tqdm's per-step refresh is measurable host overhead on short LCM
+        # runs; progress reaches clients via the job callbacks instead.
+        pipeline.set_progress_bar_config(disable=True)
+
+        # Attention: fused SDPA/xFormers, slicing only as last resort
+        _configure_attention(pipeline, current_device)
+        _compile_pipeline(pipeline, current_device)
+        clear_prompt_cache()
+        _scheduler_cache.clear()
+        _prewarm_schedulers(pipeline)
+        if current_device == "mps":
+            _enable_mps_fp16_autocast(pipeline)
+
         model_loaded = True
+        MODEL_HANDLE = ModelHandle(pipeline=pipeline, device=current_device, dtype=torch_dtype)
         logger.info("✅ Model loaded successfully (offline mode)!")
         
     except Exception as e:
@@ -296,7 +589,7 @@ def load_model_local(model_path: str):
 
 def load_model_from_safetensors(model_path: str):
     """Load from safetensors file - requires network for config on first run"""
-    global pipeline, current_device, model_loaded
+    global pipeline, current_device, model_loaded, MODEL_HANDLE
     
     logger.info(f"Loading model from safetensors: {model_path}")
     
@@ -319,19 +612,33 @@ def load_model_from_safetensors(model_path: str):
         pipeline.safety_checker = None
         pipeline.requires_safety_checker = False
         
-        # Enable memory optimizations
         if current_device == "cuda":
-            pipeline.enable_attention_slicing()
-            try:
-                pipeline.enable_xformers_memory_efficient_attention()
-                logger.info("Enabled xformers memory efficient attention")
-            except Exception:
-                pass
-        elif current_device == "mps":
-            pipeline.enable_attention_slicing()
-            logger.info("Enabled attention slicing for MPS")
-        
+            # NHWC fp16 convs map directly onto tensor-core tile layouts
+            pipeline.unet.to(memory_format=torch.channels_last)
+            pipeline.vae.to(memory_format=torch.channels_last)
+
+        if current_device != "cpu":
+            # Sliced VAE decode caps peak VRAM/unified memory for
+            # batched/768px requests; it is a no-op at batch size 1. Tiling
+            # is deliberately left off: outputs are capped at 768px where
+            # tiles would only add seams, not savings.
+            pipeline.vae.enable_slicing()
+
+        # tqdm's per-step refresh is measurable host overhead on short LCM
+        # runs; progress reaches clients via the job callbacks instead.
+        pipeline.set_progress_bar_config(disable=True)
+
+        # Attention: fused SDPA/xFormers, slicing only as last resort
+        _configure_attention(pipeline, current_device)
+        _compile_pipeline(pipeline, current_device)
+        clear_prompt_cache()
+        _scheduler_cache.clear()
+        _prewarm_schedulers(pipeline)
+        if current_device == "mps":
+            _enable_mps_fp16_autocast(pipeline)
+
         model_loaded = True
+        MODEL_HANDLE = ModelHandle(pipeline=pipeline, device=current_device, dtype=torch_dtype)
         logger.info("✅ Model loaded successfully!")
         
     except Exception as e:
@@ -341,21 +648,54 @@ def load_model_from_safetensors(model_path: str):
         raise
 
 
+def _warmup_pipeline() -> None:
+    """
+    Run two tiny dummy inferences so the first real request doesn't pay cuDNN
+    autotune, allocator warmup and torch.compile graph capture (which can add
+    tens of seconds). Skipped on CPU where the cost outweighs the benefit.
+    """
+    if pipeline is None or current_device == "cpu":
+        return
+    try:
+        start = time.time()
+        for width, height in SETTINGS.warmup_shapes:
+            # Two passes per shape: reduce-overhead compile finishes its
+            # graph capture on the second call.
+            for _ in range(2):
+                pipeline(
+                    prompt="warmup",
+                    negative_prompt="",
+                    image=Image.new("RGB", (width, height)),
+                    strength=0.5,
+                    num_inference_steps=2,
+                    guidance_scale=1.0,
+                )
+        logger.info(f"Pipeline warmup finished in {time.time() - start:.1f}s")
+    except Exception as e:
+        logger.warning(f"Pipeline warmup failed (non-fatal): {e}")
+
+
 def image_to_base64(image: Image.Image, format: str = "PNG") -> str:
     """Convert PIL Image to base64 string"""
     buffer = io.BytesIO()
     image.save(buffer, format=format)
-    return base64.b64encode(buffer.getvalue()).decode()
+    # getbuffer() hands the encoder a zero-copy view; getvalue() would
+    # duplicate the multi-MB PNG bytes first.
+    return _b64encode_str(buffer.getbuffer())
+
+
+def base64_payload_to_bytes(base64_str: str) -> bytes:
+    """Decode a (possibly data-URL) base64 image payload to raw bytes."""
+    # Slice past the data-URL header instead of split(','), which copies the
+    # whole multi-MB base64 body just to discard the prefix.
+    if base64_str.startswith("data:"):
+        base64_str = base64_str[base64_str.find(",") + 1:]
+    return _b64.b64decode(base64_str)
 
 
 def base64_to_image(base64_str: str) -> Image.Image:
     """Convert base64 string to PIL Image"""
-    # Handle data URL format
-    if base64_str.startswith("data:"):
-        base64_str = base64_str.split(",")[1]
-    
-    image_data = base64.b64decode(base64_str)
-    return Image.open(io.BytesIO(image_data))
+    return Image.open(io.BytesIO(base64_payload_to_bytes(base64_str)))
 
 
 @app.on_event("startup")
@@ -374,30 +714,27 @@ async def startup_event():
     logger.info("=" * 60)
 
     # region agent log
-    try:
-        SETTINGS.debug_log_path.parent.mkdir(parents=True, exist_ok=True)
-        SETTINGS.debug_log_path.open("a").write(json.dumps({
-            "sessionId": "debug-session",
-            "runId": "pre-fix",
-            "hypothesisId": "H1",
-            "location": "backend/server.py:startup_event",
-            "message": "Startup model presence check",
-            "data": {
-                "localModelExists": local_model_path.exists(),
-                "safetensorsExists": safetensors_path.exists(),
-                "cwd": os.getcwd()
-            },
-            "timestamp": int(time.time() * 1000)
-        }) + "\n")
-    except Exception:
-        pass
+    # Collected now, written together with the load result below: one append
+    # instead of two unbuffered open()/write() calls during startup.
+    startup_debug_entries = [_debug_entry(
+        "backend/server.py:startup_event",
+        "Startup model presence check",
+        {
+            "localModelExists": local_model_path.exists(),
+            "safetensorsExists": safetensors_path.exists(),
+            "cwd": os.getcwd(),
+        },
+        run_id="pre-fix",
+    )]
     # endregion
     
     # Prefer local diffusers format (fully offline)
     if local_model_path.exists():
         logger.info(f"Found local model directory: {local_model_path}")
         try:
-            load_model_local(str(local_model_path))
+            # from_pretrained does seconds of disk I/O; keep it off the loop
+            # so health checks respond while the model loads.
+            await asyncio.to_thread(load_model_local, str(local_model_path))
         except Exception as e:
             logger.error(f"Failed to load local model: {e}")
             logger.warning("⚠️ Server starting without model")
@@ -410,17 +747,42 @@ async def startup_event():
         logger.info("")
         logger.info("Attempting to load from safetensors (may require network)...")
         
-        # Temporarily disable offline mode for first-time setup
+        # Temporarily disable offline mode for first-time setup. Popping the
+        # env vars is not enough on its own: huggingface_hub and transformers
+        # latch them into module constants at import time (and this module
+        # sets them before those imports), so flip the latched flags too or
+        # from_single_file's one legitimate config download still fails.
         os.environ.pop('HF_HUB_OFFLINE', None)
         os.environ.pop('TRANSFORMERS_OFFLINE', None)
-        
         try:
-            load_model_from_safetensors(str(safetensors_path))
-            # Save for next time
+            import huggingface_hub.constants as _hf_constants
+            _hf_constants.HF_HUB_OFFLINE = False
+        except Exception:
+            pass
+        try:
+            import transformers.utils.hub as _transformers_hub
+            _transformers_hub._is_offline_mode = False
+        except Exception:
+            pass
+
+        try:
+            await asyncio.to_thread(load_model_from_safetensors, str(safetensors_path))
+            # Save for next time — in the background: serializing ~2GB of
+            # shards would otherwise delay queue startup by 5-15s.
             if model_loaded and pipeline is not None:
-                logger.info(f"Saving model locally for offline use...")
-                pipeline.save_pretrained(str(local_model_path))
-                logger.info(f"✅ Model saved to {local_model_path}")
+                logger.info("Saving model locally for offline use (background)...")
+                save_task = asyncio.create_task(
+                    asyncio.to_thread(pipeline.save_pretrained, str(local_model_path)),
+                    name="sd-save-pretrained",
+                )
+
+                def _log_save_result(t: asyncio.Task) -> None:
+                    if t.exception() is not None:
+                        logger.warning(f"Background model save failed: {t.exception()}")
+                    else:
+                        logger.info(f"✅ Model saved to {local_model_path}")
+
+                save_task.add_done_callback(_log_save_result)
         except Exception as e:
             logger.error(f"Failed to load from safetensors: {e}")
             logger.warning("⚠️ Server starting without model")
@@ -431,6 +793,9 @@ async def startup_event():
         logger.error(f"  - Safetensors: {safetensors_path}")
         logger.warning("⚠️ Server starting without model")
     
+    if model_loaded and SETTINGS.warmup_on_startup:
+        await asyncio.to_thread(_warmup_pipeline)
+
     logger.info("=" * 60)
     if model_loaded:
         logger.info(f"✅ Ready for inference on {current_device.upper()}")
@@ -443,23 +808,18 @@ async def startup_event():
     asyncio.create_task(periodic_cleanup_task(JOB_STORE), name="job-ttl-cleanup")
 
     # region agent log
-    try:
-        SETTINGS.debug_log_path.open("a").write(json.dumps({
-            "sessionId": "debug-session",
-            "runId": "pre-fix",
-            "hypothesisId": "H1",
-            "location": "backend/server.py:startup_event",
-            "message": "Startup model load result",
-            "data": {
-                "modelLoaded": model_loaded,
-                "device": current_device,
-                "localModelPath": str(local_model_path),
-                "safetensorsPath": str(safetensors_path)
-            },
-            "timestamp": int(time.time() * 1000)
-        }) + "\n")
-    except Exception:
-        pass
+    startup_debug_entries.append(_debug_entry(
+        "backend/server.py:startup_event",
+        "Startup model load result",
+        {
+            "modelLoaded": model_loaded,
+            "device": current_device,
+            "localModelPath": str(local_model_path),
+            "safetensorsPath": str(safetensors_path),
+        },
+        run_id="pre-fix",
+    ))
+    _debug_log(*startup_debug_entries)
     # endregion
 
 
@@ -505,10 +865,12 @@ async def img2img(
     sampler_name: str = Form("euler"),
     scheduler: str = Form("normal"),
     denoise: float = Form(0.75),
+    format: str = "png",
 ):
     """
     Perform img2img generation
-    Returns the generated image as base64
+    Returns the generated image as base64 (?format=webp for a lossy but
+    much smaller and faster-to-encode response; default stays lossless PNG)
     """
     global pipeline
     
@@ -530,7 +892,10 @@ async def img2img(
         error_msg = f"Invalid parameter combination: steps={steps} × denoise={denoise} = {effective_steps} effective steps. Need at least 1. Try increasing steps (≥10) or denoise (≥0.1)."
         logger.error(f"❌ {error_msg}")
         raise HTTPException(status_code=400, detail=error_msg)
-    
+
+    if format not in ("png", "webp"):
+        raise HTTPException(status_code=400, detail="format must be 'png' or 'webp'")
+
     try:
         logger.info("📷 Reading input image bytes...")
         image_bytes = await image.read()
@@ -551,6 +916,7 @@ async def img2img(
                     "sampler_name": sampler_name,
                     "scheduler": scheduler,
                     "denoise": denoise,
+                    "response_format": format,
                 },
             },
         )
@@ -577,6 +943,77 @@ async def img2img(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/img2img/binary")
+async def img2img_binary(
+    image: UploadFile = File(...),
+    positive_prompt: str = Form(...),
+    negative_prompt: str = Form(""),
+    seed: int = Form(42),
+    steps: int = Form(20),
+    cfg: float = Form(7.5),
+    sampler_name: str = Form("euler"),
+    scheduler: str = Form("normal"),
+    denoise: float = Form(0.75),
+):
+    """
+    Same as /api/img2img but returns the raw PNG bytes instead of a base64
+    data URL (saves the 33% base64 inflation for clients that can use a blob).
+    """
+    if not model_loaded or pipeline is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    effective_steps = int(steps * denoise)
+    if effective_steps < 1:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid parameter combination: steps={steps} × denoise={denoise} = {effective_steps} effective steps. Need at least 1. Try increasing steps (≥10) or denoise (≥0.1).",
+        )
+
+    try:
+        image_bytes = await image.read()
+        rec = await JOB_STORE.create(
+            "img2img",
+            {
+                "image_bytes": image_bytes,
+                "emit_progress": False,
+                "params": {
+                    "positive_prompt": positive_prompt,
+                    "negative_prompt": negative_prompt,
+                    "seed": seed,
+                    "steps": steps,
+                    "cfg": cfg,
+                    "sampler_name": sampler_name,
+                    "scheduler": scheduler,
+                    "denoise": denoise,
+                },
+            },
+        )
+        try:
+            await JOB_QUEUE.enqueue(rec.job_id, "img2img")
+        except Exception:
+            await JOB_STORE.fail(rec.job_id, "Queue is full. Try again shortly.")
+            raise HTTPException(status_code=429, detail="Queue is full. Try again shortly.")
+
+        finished = await JOB_STORE.wait(rec.job_id)
+        if finished.status == "succeeded" and finished.result is not None:
+            # The disk artifact is written on a background I/O thread and may
+            # not exist (or be complete) yet — serve the encoded bytes the
+            # result already carries instead of racing that write.
+            mime, _, b64_payload = finished.result["image"].partition(";base64,")
+            return Response(
+                content=_b64.b64decode(b64_payload),
+                media_type=mime.removeprefix("data:"),
+            )
+        if finished.status == "failed" and finished.error is not None:
+            raise HTTPException(status_code=500, detail=finished.error.message)
+        if finished.status == "cancelled":
+            raise HTTPException(status_code=499, detail="Cancelled")
+        raise HTTPException(status_code=500, detail="Job did not complete successfully")
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/img2img/stream")
 async def img2img_stream(
     image: UploadFile = File(...),
@@ -604,18 +1041,11 @@ async def img2img_stream(
         raise HTTPException(status_code=400, detail=error_msg)
     
     # region agent log
-    try:
-        SETTINGS.debug_log_path.open("a").write(json.dumps({
-            "sessionId": "debug-session",
-            "runId": "run1",
-            "hypothesisId": "H1",
-            "location": "backend/server.py:img2img_stream",
-            "message": "Entered img2img_stream endpoint",
-            "data": {"steps": steps, "sampler": sampler_name, "scheduler": scheduler, "denoise": denoise},
-            "timestamp": int(time.time() * 1000)
-        }) + "\n")
-    except Exception:
-        pass
+    _debug_log(_debug_entry(
+        "backend/server.py:img2img_stream",
+        "Entered img2img_stream endpoint",
+        {"steps": steps, "sampler": sampler_name, "scheduler": scheduler, "denoise": denoise},
+    ))
     # endregion
 
     async def generate():
@@ -645,28 +1075,21 @@ async def img2img_stream(
                 await JOB_QUEUE.enqueue(rec.job_id, "img2img")
             except Exception:
                 await JOB_STORE.fail(rec.job_id, "Queue is full. Try again shortly.")
-                yield {"event": "error", "data": json.dumps({"status": "error", "message": "Queue is full"})}
+                yield {"event": "error", "data": json_dumps({"status": "error", "message": "Queue is full"})}
                 return
 
             # Initial progress for legacy clients
-            yield {"event": "progress", "data": json.dumps({"step": 0, "total_steps": steps, "progress": 0, "status": "starting"})}
+            yield {"event": "progress", "data": json_dumps({"step": 0, "total_steps": steps, "progress": 0, "status": "starting"})}
 
             # Replay history then subscribe for live events (legacy event mapping)
             history = await JOB_STORE.list_events_snapshot(rec.job_id)
             q = await JOB_STORE.subscribe(rec.job_id)
             # region agent log
-            try:
-                SETTINGS.debug_log_path.open("a").write(json.dumps({
-                    "sessionId": "debug-session",
-                    "runId": "run1",
-                    "hypothesisId": "H1",
-                    "location": "backend/server.py:img2img_stream.generate",
-                    "message": "Subscribed to job events",
-                    "data": {"jobId": rec.job_id},
-                    "timestamp": int(time.time() * 1000)
-                }) + "\n")
-            except Exception:
-                pass
+            _debug_log(_debug_entry(
+                "backend/server.py:img2img_stream.generate",
+                "Subscribed to job events",
+                {"jobId": rec.job_id},
+            ))
             # endregion
 
             try:
@@ -681,10 +1104,10 @@ async def img2img_stream(
                         cur = int(ev.data.get("current", 0))
                         tot = int(ev.data.get("total", steps))
                         pct = float(ev.data.get("percent", 0.0))
-                        yield {"event": "progress", "data": json.dumps({"step": cur, "total_steps": tot, "progress": pct})}
+                        yield {"event": "progress", "data": json_dumps({"step": cur, "total_steps": tot, "progress": pct})}
                     elif ev.event == "completed":
                         result = (ev.data.get("result") or {})
-                        yield {"event": "complete", "data": json.dumps({
+                        yield {"event": "complete", "data": json_dumps({
                             "status": "success",
                             "image": result.get("image"),
                             "time_taken": result.get("time_taken"),
@@ -694,10 +1117,10 @@ async def img2img_stream(
                         return
                     elif ev.event == "failed":
                         msg = (ev.data.get("error") or {}).get("message", "Job failed")
-                        yield {"event": "error", "data": json.dumps({"status": "error", "message": msg})}
+                        yield {"event": "error", "data": json_dumps({"status": "error", "message": msg})}
                         return
                     elif ev.event == "cancelled":
-                        yield {"event": "error", "data": json.dumps({"status": "error", "message": "Cancelled"})}
+                        yield {"event": "error", "data": json_dumps({"status": "error", "message": "Cancelled"})}
                         return
             finally:
                 if rec is not None and q is not None:
@@ -706,24 +1129,17 @@ async def img2img_stream(
                     except Exception:
                         pass
                 # region agent log
-                try:
-                    SETTINGS.debug_log_path.open("a").write(json.dumps({
-                        "sessionId": "debug-session",
-                        "runId": "run1",
-                        "hypothesisId": "H1",
-                        "location": "backend/server.py:img2img_stream.generate",
-                        "message": "Unsubscribed from job events",
-                        "data": {"jobId": rec.job_id if rec is not None else None},
-                        "timestamp": int(time.time() * 1000)
-                    }) + "\n")
-                except Exception:
-                    pass
+                _debug_log(_debug_entry(
+                    "backend/server.py:img2img_stream.generate",
+                    "Unsubscribed from job events",
+                    {"jobId": rec.job_id if rec is not None else None},
+                ))
                 # endregion
             
         except Exception as e:
             yield {
                 "event": "error",
-                "data": json.dumps({"status": "error", "message": str(e)})
+                "data": json_dumps({"status": "error", "message": str(e)})
             }
     
     return EventSourceResponse(generate())
@@ -756,11 +1172,10 @@ async def img2img_base64(
         raise HTTPException(status_code=400, detail=error_msg)
     
     try:
-        # Convert base64 input to bytes for the job system (store bytes, decode in worker)
-        input_image = base64_to_image(image_base64).convert("RGB")
-        buf = io.BytesIO()
-        input_image.save(buf, format="PNG")
-        image_bytes = buf.getvalue()
+        # Pass the decoded bytes straight to the job system: the worker's
+        # decode_image_rgb handles whatever format the client sent, so the old
+        # PIL decode + PNG re-encode round-trip here was pure overhead.
+        image_bytes = await asyncio.to_thread(base64_payload_to_bytes, image_base64)
 
         rec = await JOB_STORE.create(
             "img2img",
@@ -813,13 +1228,70 @@ class TripoSRRequest(BaseModel):
     texture_resolution: int = 2048
 
 
+# Put the local tsr package on sys.path once at import time: the per-call
+# sys.path.insert + importlib lookup in the loaders ran on every request.
+# The import stays guarded so the SD half of the server works without
+# TripoSR's dependencies installed.
+import sys
+
+_BACKEND_DIR = Path(__file__).parent
+if str(_BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_DIR))
+
+try:
+    from tsr.system import TSR
+except Exception:
+    TSR = None
+
+
+def _compile_triposr(model, device: str) -> None:
+    """
+    Compile the TSR submodules with Inductor (reduce-overhead) so repeated
+    requests skip Python dispatch, especially in the per-chunk NeRF sweep.
+    reduce-overhead also captures the static-shape chunk kernels into CUDA
+    graphs, so per-chunk launch latency is replayed rather than re-issued —
+    hand-rolled torch.cuda.graph capture would add the same thing minus
+    Inductor's shape guards (chunk size changes with free VRAM per request).
+    Opt-in via TRIPOSR_COMPILE=1: the one-time compile cost is tens of seconds
+    and only pays off on GPU servers with steady traffic.
+    """
+    if os.environ.get("TRIPOSR_COMPILE") != "1":
+        return
+    if device not in ("cuda", "mps") or not hasattr(torch, "compile"):
+        return
+    try:
+        model.image_tokenizer = torch.compile(model.image_tokenizer, mode="reduce-overhead")
+        model.tokenizer = torch.compile(model.tokenizer, mode="reduce-overhead")
+        model.backbone = torch.compile(model.backbone, mode="reduce-overhead")
+        model.post_processor = torch.compile(model.post_processor, mode="reduce-overhead")
+        model.renderer.forward = torch.compile(model.renderer.forward, mode="reduce-overhead")
+        logger.info("  torch.compile enabled for TripoSR (reduce-overhead)")
+    except Exception as e:
+        logger.warning(f"  torch.compile unavailable for TripoSR: {e}")
+
+
+def _warmup_triposr(model, device: str) -> None:
+    """One dummy conditioning pass so the first real request doesn't pay
+    compile/autotune cost. Skipped on CPU."""
+    if device == "cpu":
+        return
+    try:
+        start = time.time()
+        with torch.inference_mode():
+            model([Image.new("RGB", (512, 512), (128, 128, 128))], device=device)
+        logger.info(f"  TripoSR warmup finished in {time.time() - start:.1f}s")
+    except Exception as e:
+        logger.warning(f"  TripoSR warmup failed (non-fatal): {e}")
+
+
 def load_triposr_model(chunk_size: int = 8192):
     """Load TripoSR model from local directory using TSR system"""
-    global triposr_model, triposr_loaded, current_device
+    global triposr_model, triposr_loaded, current_device, triposr_device
     
     if triposr_loaded and triposr_model is not None:
-        # Update chunk size if model already loaded
-        triposr_model.renderer.set_chunk_size(chunk_size)
+        # Update chunk size if model already loaded (skip the no-op write)
+        if getattr(triposr_model.renderer, "chunk_size", None) != chunk_size:
+            triposr_model.renderer.set_chunk_size(chunk_size)
         return True
     
     model_dir = Path(__file__).parent.parent / "data" / "models"
@@ -832,15 +1304,11 @@ def load_triposr_model(chunk_size: int = 8192):
     logger.info("=" * 60)
     logger.info("🔺 Loading TripoSR model using TSR system...")
     
+    if TSR is None:
+        logger.error("❌ tsr package unavailable (missing dependencies?)")
+        return False
+
     try:
-        # Import TSR from local tsr module
-        import sys
-        backend_dir = Path(__file__).parent
-        if str(backend_dir) not in sys.path:
-            sys.path.insert(0, str(backend_dir))
-        
-        from tsr.system import TSR
-        
         # Determine device
         device, torch_dtype = get_device_and_dtype()
         # TripoSR works better with float32 on MPS
@@ -848,7 +1316,13 @@ def load_triposr_model(chunk_size: int = 8192):
             torch_dtype = torch.float32
         
         logger.info(f"  Device: {device}, dtype: {torch_dtype}")
-        
+
+        # TripoSR's transformer and NeRF MLP sweeps are matmul-bound; make
+        # sure TF32 + cuDNN autotune are on even if SD startup didn't run.
+        if device == "cuda":
+            enable_cuda_fast_math()
+
+
         # Load full TSR model using from_pretrained
         logger.info(f"  Loading TSR model from {triposr_path}...")
         model = TSR.from_pretrained(
@@ -862,7 +1336,31 @@ def load_triposr_model(chunk_size: int = 8192):
         
         # Move to device
         model.to(device)
-        
+
+        # Serving-only process: freeze parameters and switch to eval so no
+        # op pays autograd bookkeeping even outside the inference_mode scopes.
+        model.eval()
+        for p in model.parameters():
+            p.requires_grad_(False)
+
+        _compile_triposr(model, device)
+        _warmup_triposr(model, device)
+
+        # Prewarm the shared rembg session so the first remove_bg request
+        # doesn't pay the ONNX Runtime init + U2-Net weight load (1-3s).
+        try:
+            from app.services.triposr_service import get_rembg_session
+
+            get_rembg_session()
+        except Exception as e:
+            logger.warning(f"  rembg prewarm failed (non-fatal): {e}")
+
+        try:
+            triposr_device = str(next(model.parameters()).device)
+        except Exception:
+            triposr_device = device
+        model._device_str = triposr_device
+
         triposr_model = model
         triposr_loaded = True
         current_device = device
@@ -884,18 +1382,11 @@ def remove_background_tsr(image: Image.Image, foreground_ratio: float = 0.85) ->
     Uses the same approach as the reference TripoSR run.py
     """
     try:
-        import rembg
-        
-        # Import utilities from local tsr module
-        import sys
-        backend_dir = Path(__file__).parent
-        if str(backend_dir) not in sys.path:
-            sys.path.insert(0, str(backend_dir))
-        
         from tsr.utils import remove_background, resize_foreground
-        
-        # Create rembg session
-        rembg_session = rembg.new_session()
+        from app.services.triposr_service import composite_gray_background, get_rembg_session
+
+        # Shared cached session: creating one per request reloads the ONNX model
+        rembg_session = get_rembg_session()
         
         # Remove background using tsr utility
         image_rgba = remove_background(image, rembg_session)
@@ -904,12 +1395,9 @@ def remove_background_tsr(image: Image.Image, foreground_ratio: float = 0.85) ->
         image_processed = resize_foreground(image_rgba, foreground_ratio)
         
         # Convert to RGB with gray background (as expected by TripoSR)
-        image_np = np.array(image_processed).astype(np.float32) / 255.0
-        image_rgb = image_np[:, :, :3] * image_np[:, :, 3:4] + (1 - image_np[:, :, 3:4]) * 0.5
-        image_final = Image.fromarray((image_rgb * 255.0).astype(np.uint8))
-        
-        return image_final
-        
+        return composite_gray_background(image_processed)
+
+
     except ImportError as e:
         logger.warning(f"rembg not installed or tsr utils not available: {e}")
         # Fallback: simple resize
@@ -918,33 +1406,17 @@ def remove_background_tsr(image: Image.Image, foreground_ratio: float = 0.85) ->
 
 def process_triposr_image(image: Image.Image, target_size: int = 512) -> Image.Image:
     """Process image for TripoSR: resize to square"""
-    # Resize to target size maintaining aspect ratio, then center crop
-    w, h = image.size
-    scale = target_size / min(w, h)
-    new_w, new_h = int(w * scale), int(h * scale)
-    image = image.resize((new_w, new_h), Image.Resampling.LANCZOS)
-    
-    # Center crop to square
-    left = (new_w - target_size) // 2
-    top = (new_h - target_size) // 2
-    image = image.crop((left, top, left + target_size, top + target_size))
-    
-    return image
+    from app.services.triposr_service import process_triposr_image as _process
+
+    return _process(image, target_size)
 
 
 @app.get("/api/triposr/info")
 async def get_triposr_info():
     """Get TripoSR model status"""
-    device = "none"
-    if triposr_model is not None:
-        try:
-            # Get device from model parameters
-            device = str(next(triposr_model.parameters()).device)
-        except:
-            device = current_device
     return {
         "loaded": triposr_loaded,
-        "device": device,
+        "device": triposr_device,
         "model_name": "TripoSR Base",
     }
 
@@ -954,12 +1426,51 @@ async def load_triposr_endpoint(chunk_size: int = 8192):
     """Explicitly load TripoSR model"""
     success = load_triposr_model(chunk_size)
     if success:
-        device = str(next(triposr_model.parameters()).device)
-        return {"status": "success", "device": device}
+        return {"status": "success", "device": triposr_device}
     else:
         raise HTTPException(status_code=500, detail="Failed to load TripoSR model")
 
 
+@app.get("/api/triposr/preview/{name}")
+async def get_triposr_preview(name: str):
+    """Serve a preview PNG from the in-memory cache, falling back to disk."""
+    from app.services.triposr_service import get_cached_preview
+
+    if Path(name).name != name:
+        raise HTTPException(status_code=404, detail="Preview not found")
+    data = get_cached_preview(name)
+    if data is not None:
+        return Response(content=data, media_type="image/png")
+    preview_path = SETTINGS.output_dir / name
+    if preview_path.is_file():
+        return FileResponse(preview_path, media_type="image/png")
+    raise HTTPException(status_code=404, detail="Preview not found")
+
+
+@app.get("/api/triposr/jobs/{job_id}")
+async def get_triposr_job(job_id: str):
+    """Poll a TripoSR job submitted with ?wait=false."""
+    try:
+        rec = await JOB_STORE.get(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    body: dict = {
+        "job_id": rec.job_id,
+        "status": rec.status,
+        "progress": {
+            "current": rec.progress.current,
+            "total": rec.progress.total,
+            "percent": rec.progress.percent,
+            "stage": rec.progress.stage,
+        },
+    }
+    if rec.status == "succeeded" and rec.result is not None:
+        body["result"] = rec.result
+    if rec.status == "failed" and rec.error is not None:
+        body["error"] = rec.error.message
+    return body
+
+
 @app.post("/api/triposr")
 async def generate_3d_mesh(
     image: UploadFile = File(...),
@@ -972,11 +1483,14 @@ async def generate_3d_mesh(
     render_video: bool = Form(False),
     render_n_views: int = Form(30),
     render_resolution: int = Form(256),
+    wait: bool = True,
 ):
     """
     Generate 3D mesh from single image using TripoSR.
     Returns path to generated GLB file and optional turntable video.
-    
+    With ?wait=false, returns 202 + a job id immediately; poll
+    /api/triposr/jobs/{job_id} (or use the SSE stream) for completion.
+
     Parameters:
     - foreground_ratio: Ratio of foreground to image (0.5-1.0)
     - mc_resolution: Marching cubes grid resolution (64-512)
@@ -1034,6 +1548,14 @@ async def generate_3d_mesh(
             await JOB_STORE.fail(rec.job_id, "Queue is full. Try again shortly.")
             raise HTTPException(status_code=429, detail="Queue is full. Try again shortly.")
 
+        if not wait:
+            # Hand back immediately; the connection no longer rides out the
+            # full 2-10s inference and clients can fan out submissions.
+            return JSONResponse(
+                status_code=202,
+                content={"job_id": rec.job_id, "status": "queued"},
+            )
+
         finished = await JOB_STORE.wait(rec.job_id)
         if finished.status == "succeeded" and finished.result is not None:
             logger.info("=" * 50)
@@ -1052,5 +1574,12 @@ async def generate_3d_mesh(
 
 
 if __name__ == "__main__":
+    try:
+        # uvicorn[standard] ships uvloop; installing it before run() makes the
+        # faster loop explicit rather than relying on uvicorn's auto-detect.
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
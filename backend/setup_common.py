@@ -0,0 +1,31 @@
+"""
+Shared helpers for the one-time setup scripts (setup_manual.py,
+setup_model.py, setup_offline.py).
+
+The three scripts previously each carried their own copy of the model
+paths and device detection; keeping them here stops the copies from
+drifting. Heavy imports stay inside the functions so the fully-offline
+manual path never pays the torch import cost just to compute paths.
+"""
+
+from pathlib import Path
+
+
+def model_paths() -> tuple[Path, Path]:
+    """Return (source safetensors checkpoint, local diffusers model dir)."""
+    model_dir = Path(__file__).parent.parent / "data" / "models"
+    return (
+        model_dir / "v1-5-pruned-emaonly-fp16.safetensors",
+        model_dir / "sd-v1-5-local",
+    )
+
+
+def detect_device_dtype():
+    """Best (device, torch dtype) for loading the pipeline. Imports torch lazily."""
+    import torch
+
+    if torch.cuda.is_available():
+        return "cuda", torch.float16
+    if torch.backends.mps.is_available():
+        return "mps", torch.float16
+    return "cpu", torch.float32
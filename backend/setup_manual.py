@@ -10,117 +10,231 @@ Run: python setup_manual.py
 import os
 import sys
 import json
+import struct
 from pathlib import Path
 
+from setup_common import model_paths
+
+# Component targets: (display name, source key prefix, relative output path).
+# The checkpoint uses CompVis naming; stripping the prefix yields the key
+# names the rest of this pipeline layout expects.
+COMPONENTS = (
+    ("UNet", "model.diffusion_model.", Path("unet") / "diffusion_pytorch_model.safetensors"),
+    ("VAE", "first_stage_model.", Path("vae") / "diffusion_pytorch_model.safetensors"),
+    ("Text Encoder", "cond_stage_model.transformer.", Path("text_encoder") / "model.safetensors"),
+)
+
+_COPY_CHUNK = 4 * 1024 * 1024
+
+
+def read_safetensors_header(path: Path) -> tuple[dict, int]:
+    """
+    Parse a safetensors header without touching the tensor payload.
+    Returns (header, body_base) where header maps tensor name ->
+    {dtype, shape, data_offsets} and body_base is the file offset where
+    tensor data begins.
+    """
+    with open(path, "rb") as f:
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len))
+    header.pop("__metadata__", None)
+    return header, 8 + header_len
+
+
+def extract_component(src_path: Path, dst_path: Path, entries: list, body_base: int) -> None:
+    """
+    Stream one component's tensors from the source checkpoint as raw bytes.
+
+    The safetensors payload layout is identical on both sides, so
+    deserializing into torch tensors and re-serializing is pure overhead —
+    we only need a new header with contiguous offsets and a byte-range copy
+    per tensor.
+
+    entries: list of (new_key, source_header_info) for this component.
+    """
+    new_header = {}
+    running = 0
+    for new_key, info in entries:
+        start, end = info["data_offsets"]
+        nbytes = end - start
+        new_header[new_key] = {
+            "dtype": info["dtype"],
+            "shape": info["shape"],
+            "data_offsets": [running, running + nbytes],
+        }
+        running += nbytes
+
+    header_bytes = json.dumps(new_header, separators=(",", ":")).encode()
+
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        if hasattr(os, "posix_fadvise"):
+            # Each worker reads its slice of the checkpoint front to back;
+            # telling the kernel so doubles readahead for the copy loop.
+            os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        dst.write(struct.pack("<Q", len(header_bytes)))
+        dst.write(header_bytes)
+        use_sendfile = hasattr(os, "sendfile")
+        if use_sendfile:
+            # Kernel-to-kernel copy: no 4 MiB bounce buffer through Python,
+            # and the whole transfer stays off the GIL.
+            dst.flush()
+        for _new_key, info in entries:
+            start, end = info["data_offsets"]
+            remaining = end - start
+            if use_sendfile:
+                offset = body_base + start
+                while remaining:
+                    try:
+                        sent = os.sendfile(dst.fileno(), src.fileno(), offset, remaining)
+                    except OSError:
+                        # e.g. filesystems without splice support; fall back
+                        # to the buffered loop for everything.
+                        use_sendfile = False
+                        src.seek(offset)
+                        break
+                    if sent == 0:
+                        raise IOError(f"Truncated read from {src_path}")
+                    offset += sent
+                    remaining -= sent
+                if not remaining:
+                    continue
+            else:
+                src.seek(body_base + start)
+            while remaining:
+                chunk = src.read(min(remaining, _COPY_CHUNK))
+                if not chunk:
+                    raise IOError(f"Truncated read from {src_path}")
+                dst.write(chunk)
+                remaining -= len(chunk)
+
+
+def component_is_current(dst_path: Path, entries: list) -> bool:
+    """
+    True if dst already holds this component's tensors: same tensor count
+    and same total payload size as the source partition implies. Enough to
+    make re-runs a no-op without hashing gigabytes.
+    """
+    try:
+        dst_header, _body_base = read_safetensors_header(dst_path)
+    except (OSError, ValueError, struct.error):
+        return False
+    if len(dst_header) != len(entries):
+        return False
+    expected = sum(info["data_offsets"][1] - info["data_offsets"][0] for _key, info in entries)
+    actual = sum(info["data_offsets"][1] - info["data_offsets"][0] for info in dst_header.values())
+    return expected == actual
+
+
 def main():
     print("=" * 60)
     print("SD 1.5 Manual Pipeline Builder - Fully Offline")
     print("=" * 60)
     print()
-    
+
     # Paths
-    model_dir = Path(__file__).parent.parent / "data" / "models"
-    safetensors_path = model_dir / "v1-5-pruned-emaonly-fp16.safetensors"
-    local_model_path = model_dir / "sd-v1-5-local"
-    
-    if not safetensors_path.exists():
+    safetensors_path, local_model_path = model_paths()
+
+    # One stat covers both the existence check and the size print.
+    try:
+        src_size = safetensors_path.stat().st_size
+    except FileNotFoundError:
         print(f"❌ Safetensors not found: {safetensors_path}")
         sys.exit(1)
-    
+
     print(f"Source: {safetensors_path}")
-    print(f"  Size: {safetensors_path.stat().st_size / 1024 / 1024:.1f} MB")
+    print(f"  Size: {src_size / 1024 / 1024:.1f} MB")
     print(f"Target: {local_model_path}")
     print()
-    
-    # Import dependencies
-    import torch
-    from safetensors.torch import load_file, save_file
-    
-    # Determine device/dtype
-    if torch.cuda.is_available():
-        device = "cuda"
-        dtype = torch.float16
-    elif torch.backends.mps.is_available():
-        device = "mps"
-        dtype = torch.float16
-    else:
-        device = "cpu"
-        dtype = torch.float32
-    
-    print(f"Device: {device}, dtype: {dtype}")
-    print()
-    
-    # Load checkpoint
-    print("Loading checkpoint...")
-    state_dict = load_file(str(safetensors_path))
-    print(f"  Loaded {len(state_dict)} tensors")
-    
-    # Key mapping for SD 1.5 checkpoints
-    # The checkpoint uses CompVis naming, we need to convert to diffusers
-    
+
+    # Extraction is a dtype-preserving byte copy and touches no device, so
+    # there is deliberately no device/dtype detection here — that belongs to
+    # the scripts that actually load the pipeline.
+
+    # Header-only parse: which bytes belong to which component, no tensor
+    # ever deserialized.
+    print("Reading checkpoint header...")
+    header, body_base = read_safetensors_header(safetensors_path)
+    print(f"  Found {len(header)} tensors")
+
     # Count keys by prefix
     prefixes = {}
-    for key in state_dict.keys():
+    for key in header:
         prefix = key.split('.')[0]
         prefixes[prefix] = prefixes.get(prefix, 0) + 1
     print(f"  Key prefixes: {prefixes}")
     print()
-    
-    # Separate weights by component
-    print("Extracting component weights...")
-    
-    unet_state = {}
-    vae_state = {}
-    text_encoder_state = {}
-    
-    for key, value in state_dict.items():
-        # UNet: model.diffusion_model.*
-        if key.startswith("model.diffusion_model."):
-            new_key = key.replace("model.diffusion_model.", "")
-            unet_state[new_key] = value
-        # VAE: first_stage_model.*
-        elif key.startswith("first_stage_model."):
-            new_key = key.replace("first_stage_model.", "")
-            vae_state[new_key] = value
-        # Text Encoder: cond_stage_model.transformer.*
-        elif key.startswith("cond_stage_model.transformer."):
-            new_key = key.replace("cond_stage_model.transformer.", "")
-            text_encoder_state[new_key] = value
-    
-    print(f"  UNet: {len(unet_state)} tensors")
-    print(f"  VAE: {len(vae_state)} tensors")  
-    print(f"  Text Encoder: {len(text_encoder_state)} tensors")
-    print()
-    
-    # Save weights in diffusers format
-    print("Saving component weights...")
-    
-    # Ensure directories exist
-    (local_model_path / "unet").mkdir(parents=True, exist_ok=True)
-    (local_model_path / "vae").mkdir(parents=True, exist_ok=True)
-    (local_model_path / "text_encoder").mkdir(parents=True, exist_ok=True)
-    
-    # Save UNet
-    unet_path = local_model_path / "unet" / "diffusion_pytorch_model.safetensors"
-    save_file(unet_state, str(unet_path))
-    print(f"  ✅ UNet saved: {unet_path.stat().st_size / 1024 / 1024:.1f} MB")
-    
-    # Save VAE  
-    vae_path = local_model_path / "vae" / "diffusion_pytorch_model.safetensors"
-    save_file(vae_state, str(vae_path))
-    print(f"  ✅ VAE saved: {vae_path.stat().st_size / 1024 / 1024:.1f} MB")
-    
-    # Save Text Encoder
-    text_path = local_model_path / "text_encoder" / "model.safetensors"
-    save_file(text_encoder_state, str(text_path))
-    print(f"  ✅ Text Encoder saved: {text_path.stat().st_size / 1024 / 1024:.1f} MB")
-    
+
+    # Partition header entries by component
+    print("Partitioning component weights...")
+
+    component_entries = {name: [] for name, _prefix, _rel in COMPONENTS}
+    # Dispatch table built once: (prefix, strip length, target list) — the
+    # per-key loop does one startswith per candidate and a constant slice.
+    dispatch = tuple(
+        (component_prefix, len(component_prefix), component_entries[name])
+        for name, component_prefix, _rel in COMPONENTS
+    )
+    for key, info in header.items():
+        for component_prefix, prefix_len, entries in dispatch:
+            if key.startswith(component_prefix):
+                entries.append((key[prefix_len:], info))
+                break
+
+    # Copy in source-file order: each worker then reads one forward sweep
+    # the kernel readahead can track, instead of seeking in header order.
+    for entries in component_entries.values():
+        entries.sort(key=lambda item: item[1]["data_offsets"][0])
+
+    for name, _prefix, _rel in COMPONENTS:
+        print(f"  {name}: {len(component_entries[name])} tensors")
     print()
-    
+
+    # Re-runs are common while debugging setup; when every component already
+    # holds the expected tensors, skip the multi-GB copy entirely.
+    if all(
+        component_is_current(local_model_path / rel_path, component_entries[name])
+        for name, _prefix, rel_path in COMPONENTS
+    ):
+        print("Component weights already extracted, skipping")
+        print()
+    else:
+        # Save weights in diffusers format
+        print("Saving component weights...")
+
+        # Byte-range copies release the GIL inside read()/write(), so the
+        # three component extractions overlap and the SSD sees queue
+        # depth > 1.
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = []
+            for name, _prefix, rel_path in COMPONENTS:
+                dst_path = local_model_path / rel_path
+                dst_path.parent.mkdir(parents=True, exist_ok=True)
+                futures.append((name, dst_path, executor.submit(
+                    extract_component,
+                    safetensors_path,
+                    dst_path,
+                    component_entries[name],
+                    body_base,
+                )))
+            for name, dst_path, future in futures:
+                future.result()
+                print(f"  ✅ {name} saved: {dst_path.stat().st_size / 1024 / 1024:.1f} MB")
+
+        if hasattr(os, "posix_fadvise"):
+            # One-shot setup: evict the ~4 GB checkpoint from the page cache
+            # so it doesn't squeeze out memory other processes are actually
+            # using.
+            with open(safetensors_path, "rb") as src:
+                os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+        print()
+
     # Now we need to download tokenizer files - these are just text files
     print("Downloading tokenizer vocabulary (small files, ~1MB)...")
     download_tokenizer_files(local_model_path / "tokenizer")
-    
+
     print()
     print("=" * 60)
     print("✅ Model setup complete!")
@@ -133,41 +247,53 @@ def main():
 
 def download_tokenizer_files(tokenizer_path: Path):
     """Download CLIP tokenizer vocabulary files"""
+    import shutil
     import urllib.request
     import ssl
-    
+    from concurrent.futures import ThreadPoolExecutor
+
     # Create unverified SSL context for corporate firewalls
     ctx = ssl.create_default_context()
     ctx.check_hostname = False
     ctx.verify_mode = ssl.CERT_NONE
-    
+
     tokenizer_path.mkdir(parents=True, exist_ok=True)
-    
+
     # URLs for CLIP tokenizer files (from OpenAI CLIP)
     base_url = "https://huggingface.co/openai/clip-vit-large-patch14/resolve/main"
-    
+
     files = {
         "vocab.json": f"{base_url}/vocab.json",
         "merges.txt": f"{base_url}/merges.txt",
     }
-    
-    for filename, url in files.items():
+
+    def _download(filename: str, url: str) -> None:
         filepath = tokenizer_path / filename
         if filepath.exists():
             print(f"  {filename} already exists, skipping")
-            continue
-        
+            return
+
         try:
             print(f"  Downloading {filename}...")
-            req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-            with urllib.request.urlopen(req, context=ctx) as response:
-                content = response.read()
-                filepath.write_bytes(content)
+            req = urllib.request.Request(url, headers={
+                'User-Agent': 'Mozilla/5.0',
+                # These files are served pre-compressed anyway; identity
+                # avoids a transparent gzip decode pass.
+                'Accept-Encoding': 'identity',
+            })
+            # Stream straight to disk instead of buffering the file in RAM.
+            with urllib.request.urlopen(req, context=ctx) as response, open(filepath, 'wb') as fp:
+                shutil.copyfileobj(response, fp, 1 << 20)
             print(f"    ✅ {filepath.stat().st_size / 1024:.1f} KB")
         except Exception as e:
             print(f"    ❌ Failed to download {filename}: {e}")
             print(f"    You may need to download manually from: {url}")
 
+    # Two independent fetches; overlapping them hides one connection's
+    # latency behind the other's transfer.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(lambda kv: _download(*kv), files.items()))
+
 
 if __name__ == "__main__":
     main()
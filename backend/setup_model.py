@@ -9,23 +9,15 @@ import os
 import sys
 from pathlib import Path
 
-# Ensure we can import diffusers
-try:
-    import torch
-    from diffusers import StableDiffusionImg2ImgPipeline
-except ImportError:
-    print("Please activate the venv first: source venv/bin/activate")
-    sys.exit(1)
+from setup_common import detect_device_dtype, model_paths
 
 def main():
     print("=" * 60)
     print("SD 1.5 Model Setup - One-Time Network Download")
     print("=" * 60)
-    
-    model_dir = Path(__file__).parent.parent / "data" / "models"
-    safetensors_path = model_dir / "v1-5-pruned-emaonly-fp16.safetensors"
-    local_model_path = model_dir / "sd-v1-5-local"
-    
+
+    safetensors_path, local_model_path = model_paths()
+
     if not safetensors_path.exists():
         print(f"❌ Safetensors file not found at: {safetensors_path}")
         print("Please download v1-5-pruned-emaonly-fp16.safetensors to data/models/")
@@ -43,18 +35,18 @@ def main():
     print("Downloading model configuration from HuggingFace...")
     print("(This requires internet, but only needs to be done once)")
     print()
-    
+
+    # Imported here, after the cheap path checks: the diffusers/transformers
+    # graph takes seconds to import, and the early exits above shouldn't pay
+    # for it.
+    try:
+        from diffusers import StableDiffusionImg2ImgPipeline
+    except ImportError:
+        print("Please activate the venv first: source venv/bin/activate")
+        sys.exit(1)
+
     # Determine device
-    if torch.cuda.is_available():
-        device = "cuda"
-        dtype = torch.float16
-    elif torch.backends.mps.is_available():
-        device = "mps"
-        dtype = torch.float16
-    else:
-        device = "cpu"
-        dtype = torch.float32
-    
+    device, dtype = detect_device_dtype()
     print(f"Using device: {device}")
     
     try:
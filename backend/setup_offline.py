@@ -42,13 +42,12 @@ def main():
     print()
     
     # Import after SSL patches
-    import torch
     from diffusers import StableDiffusionImg2ImgPipeline
-    
-    model_dir = Path(__file__).parent.parent / "data" / "models"
-    safetensors_path = model_dir / "v1-5-pruned-emaonly-fp16.safetensors"
-    local_model_path = model_dir / "sd-v1-5-local"
-    
+
+    from setup_common import detect_device_dtype, model_paths
+
+    safetensors_path, local_model_path = model_paths()
+
     if not safetensors_path.exists():
         print(f"❌ Safetensors not found: {safetensors_path}")
         sys.exit(1)
@@ -58,16 +57,7 @@ def main():
     print()
     
     # Determine device
-    if torch.cuda.is_available():
-        device = "cuda"
-        dtype = torch.float16
-    elif torch.backends.mps.is_available():
-        device = "mps"
-        dtype = torch.float16
-    else:
-        device = "cpu"
-        dtype = torch.float32
-    
+    device, dtype = detect_device_dtype()
     print(f"Device: {device}")
     print()
     
@@ -76,14 +66,30 @@ def main():
     print()
     
     try:
-        # Patch requests session to disable SSL verify
+        # One explicitly configured session instead of monkey-patching every
+        # requests call: huggingface_hub keeps its own connection pool, so
+        # the many small config fetches reuse pooled TLS connections rather
+        # than paying a wrapper on each request.
         import requests
-        old_request = requests.Session.request
-        def patched_request(self, *args, **kwargs):
-            kwargs['verify'] = False
-            return old_request(self, *args, **kwargs)
-        requests.Session.request = patched_request
-        
+        from requests.adapters import HTTPAdapter
+
+        def _insecure_session() -> requests.Session:
+            session = requests.Session()
+            session.verify = False
+            session.mount("https://", HTTPAdapter(pool_maxsize=16))
+            return session
+
+        try:
+            from huggingface_hub import configure_http_backend
+            configure_http_backend(backend_factory=_insecure_session)
+        except ImportError:
+            # Older hub releases: fall back to patching the session class.
+            old_request = requests.Session.request
+            def patched_request(self, *args, **kwargs):
+                kwargs['verify'] = False
+                return old_request(self, *args, **kwargs)
+            requests.Session.request = patched_request
+
         # Load pipeline using runwayml repo (original SD 1.5)
         # Try the original runwayml repo first
         try:
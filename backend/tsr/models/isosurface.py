@@ -1,3 +1,4 @@
+import os
 from typing import Callable, Optional, Tuple
 
 import numpy as np
@@ -8,12 +9,36 @@ import torch.nn as nn
 # This is a fallback that works without CUDA compilation
 from skimage import measure
 
+try:
+    # Optional GPU marching cubes: consumes the density grid where it already
+    # lives and skips the ~64MB D2H transfer plus skimage's single-threaded
+    # CPU pass. Opt-in via TRIPOSR_CUDA_MC=1 (vertex conventions should be
+    # eyeballed once per cumcubes version before enabling in production).
+    import cumcubes
+except ImportError:
+    cumcubes = None
+
 
 def marching_cubes_skimage(volume: torch.Tensor, level: float = 0.0) -> Tuple[torch.Tensor, torch.Tensor]:
     """
     Wrapper around skimage.measure.marching_cubes to match torchmcubes interface.
     """
-    volume_np = volume.cpu().numpy()
+    if (
+        cumcubes is not None
+        and volume.is_cuda
+        and os.environ.get("TRIPOSR_CUDA_MC") == "1"
+    ):
+        try:
+            verts, faces = cumcubes.marching_cubes(volume.float(), level)
+            # Stay on the device: the caller's flip/normalize and the
+            # color query both run there anyway.
+            return verts, faces.long()
+        except Exception as e:
+            print(f"CUDA marching cubes failed, falling back to skimage: {e}")
+
+    # float() is a no-op for fp32 and upcasts half-precision density fields,
+    # which skimage does not accept.
+    volume_np = volume.float().cpu().numpy()
     
     # skimage marching_cubes expects volume values and level
     try:
@@ -23,10 +48,10 @@ def marching_cubes_skimage(volume: torch.Tensor, level: float = 0.0) -> Tuple[to
         print(f"Marching cubes failed: {e}")
         return torch.zeros((0, 3)), torch.zeros((0, 3), dtype=torch.long)
     
-    # Convert to torch tensors
-    v_pos = torch.from_numpy(verts.astype(np.float32))
-    t_pos_idx = torch.from_numpy(faces.astype(np.int64))
-    
+    # Convert to torch tensors (zero-copy when dtypes already match)
+    v_pos = torch.from_numpy(np.asarray(verts, dtype=np.float32))
+    t_pos_idx = torch.from_numpy(np.asarray(faces, dtype=np.int64))
+
     return v_pos, t_pos_idx
 
 
@@ -44,6 +69,10 @@ class MarchingCubeHelper(IsosurfaceHelper):
         self.resolution = resolution
         self.mc_func: Callable = marching_cubes_skimage
         self._grid_vertices: Optional[torch.FloatTensor] = None
+        # Device-resident copies of the grid, uploaded once per device: at
+        # resolution 256 the grid is 3*256^3 floats (~190 MB), far too much
+        # to re-ship over PCIe on every extract_mesh call.
+        self._grid_vertices_device: dict = {}
 
     @property
     def grid_vertices(self) -> torch.FloatTensor:
@@ -61,12 +90,22 @@ class MarchingCubeHelper(IsosurfaceHelper):
             self._grid_vertices = verts
         return self._grid_vertices
 
+    def grid_vertices_on(self, device) -> torch.FloatTensor:
+        """The grid on `device`, cached across calls (CPU stays the source)."""
+        key = str(device)
+        cached = self._grid_vertices_device.get(key)
+        if cached is None:
+            cached = self.grid_vertices.to(device)
+            self._grid_vertices_device[key] = cached
+        return cached
+
     def forward(
         self,
         level: torch.FloatTensor,
     ) -> Tuple[torch.FloatTensor, torch.LongTensor]:
         level = -level.view(self.resolution, self.resolution, self.resolution)
         v_pos, t_pos_idx = self.mc_func(level.detach(), 0.0)
-        v_pos = v_pos[..., [2, 1, 0]]
-        v_pos = v_pos / (self.resolution - 1.0)
+        # Single fused flip + in-place normalize instead of advanced indexing
+        # (which materializes an extra copy of the vertex buffer).
+        v_pos = v_pos.flip(-1).div_(self.resolution - 1.0)
         return v_pos.to(level.device), t_pos_idx.to(level.device)
@@ -52,6 +52,9 @@ class TriplaneNeRFRenderer(BaseModule):
         positions = scale_tensor(
             positions, (-self.cfg.radius, self.cfg.radius), (-1, 1)
         )
+        # grid_sample requires input and grid dtypes to match; this makes the
+        # renderer tolerate half-precision triplanes with fp32 query points.
+        positions = positions.to(triplane.dtype)
 
         def _query_chunk(x):
             indices2D: torch.Tensor = torch.stack(
@@ -59,8 +62,10 @@ class TriplaneNeRFRenderer(BaseModule):
                 dim=-3,
             )
             out: torch.Tensor = F.grid_sample(
-                rearrange(triplane, "Np Cp Hp Wp -> Np Cp Hp Wp", Np=3),
-                rearrange(indices2D, "Np N Nd -> Np () N Nd", Np=3),
+                # The triplane is already (Np Cp Hp Wp); the old identity
+                # rearrange re-parsed its einops pattern on every chunk.
+                triplane,
+                indices2D.unsqueeze(1),  # Np N Nd -> Np () N Nd
                 align_corners=False,
                 mode="bilinear",
             )
@@ -23,6 +23,26 @@ from .utils import (
 )
 
 
+def _render_view_group_size(device, rays_per_view: int, num_samples: int = 128) -> int:
+    """
+    Number of turntable views to render in one renderer call. Sized against
+    free CUDA memory with headroom for the renderer's own temporaries; a
+    small fixed group elsewhere, where batching only amortizes call overhead.
+    """
+    # ~12 fp32 values per sample are live at peak across xyz, z_vals, alpha,
+    # accumulated weights and the decoder outputs.
+    bytes_per_view = rays_per_view * num_samples * 12 * 4
+    if str(device).startswith("cuda") and torch.cuda.is_available():
+        try:
+            free_bytes, _total = torch.cuda.mem_get_info(device)
+        except Exception:
+            return 4
+        # Half the free memory, capped — past a handful of views the launch
+        # overhead is already amortized.
+        return max(1, min(8, int((free_bytes // 2) // bytes_per_view)))
+    return 2
+
+
 class TSR(BaseModule):
     @dataclass
     class Config(BaseModule.Config):
@@ -147,16 +167,30 @@ class TSR(BaseModule):
             else:
                 raise NotImplementedError
 
+        # Render views in groups: batching amortizes the per-view launch
+        # overhead, but the per-ray sampling buffers (xyz/z_vals/weights are
+        # (rays, samples, ...)) scale with every view in the call and are NOT
+        # bounded by the renderer chunk size — that only caps the decoder-MLP
+        # activations. The group size keeps those transients near the
+        # per-view baseline instead of materializing all n_views at once.
+        group_size = _render_view_group_size(scene_codes.device, height * width)
+
         images = []
         for scene_code in scene_codes:
-            images_ = []
-            for i in range(n_views):
-                with torch.no_grad():
-                    image = self.renderer(
-                        self.decoder, scene_code, rays_o[i], rays_d[i]
+            frames = []
+            with torch.no_grad():
+                for start in range(0, n_views, group_size):
+                    image_batch = self.renderer(
+                        self.decoder,
+                        scene_code,
+                        rays_o[start : start + group_size],
+                        rays_d[start : start + group_size],
+                    )
+                    frames.extend(
+                        process_output(image_batch[i])
+                        for i in range(image_batch.shape[0])
                     )
-                images_.append(process_output(image))
-            images.append(images_)
+            images.append(frames)
 
         return images
 
@@ -176,7 +210,7 @@ class TSR(BaseModule):
                 density = self.renderer.query_triplane(
                     self.decoder,
                     scale_tensor(
-                        self.isosurface_helper.grid_vertices.to(scene_codes.device),
+                        self.isosurface_helper.grid_vertices_on(scene_codes.device),
                         self.isosurface_helper.points_range,
                         (-self.renderer.cfg.radius, self.renderer.cfg.radius),
                     ),
@@ -199,7 +233,7 @@ class TSR(BaseModule):
             mesh = trimesh.Trimesh(
                 vertices=v_pos.cpu().numpy(),
                 faces=t_pos_idx.cpu().numpy(),
-                vertex_colors=color.cpu().numpy() if has_vertex_color else None,
+                vertex_colors=color.float().cpu().numpy() if has_vertex_color else None,
             )
             meshes.append(mesh)
         return meshes